@@ -1,16 +1,35 @@
-from typing import List, Optional, Tuple
+from typing import Any, BinaryIO, Callable, List, Optional, Tuple, Union
 from cog import BasePredictor, Input, Path
 
+import base64
+import fcntl
+import functools
+import hashlib
+import io
+import json
+import math
 import os
+import queue
+import re
+import shutil
+import socket
+import tempfile
+import threading
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import Future, ThreadPoolExecutor
 from urllib.parse import quote_plus
 from PIL import Image
 
 from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
 
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import JavascriptException, TimeoutException
 
 
 
@@ -20,59 +39,599 @@ OPEN_METEO_ELEVATION_URL = "https://api.open-meteo.com/v1/elevation"
 OPEN_METEO_GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
 NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
 GOOGLE_GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+EARTH_WEB_URL = "https://earth.google.com/web/"
 
+class CappedRetry(Retry):
+    """Retry that sleeps out Retry-After for at most RETRY_AFTER_MAX seconds."""
 
-# ---------- Utils ----------
-def get_elevation_open_elevation(lat: float, lon: float) -> Optional[float]:
+    RETRY_AFTER_MAX = 2.0
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, self.RETRY_AFTER_MAX)
+
+def make_session(retry: Retry) -> requests.Session:
+    """Keep-alive session (reuses TCP+TLS connections across calls) with the lookup headers."""
+    session = requests.Session()
+    session.headers.update({
+        "Accept-Encoding": "gzip",
+        # Nominatim's usage policy requires an identifying User-Agent
+        "User-Agent": os.getenv("GEOCODER_UA", "videotour-geocoder/1.0 (+https://example.com)"),
+    })
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry))
+    return session
+
+# Geocoding: providers fail over to the next one, so timeouts and connection errors are not
+# retried; only a 429 gets one more try after a capped Retry-After. Worst case per provider is
+# two GEOCODE_TIMEOUTs plus RETRY_AFTER_MAX (~12s), ~5s when a provider simply hangs.
+SESSION = make_session(CappedRetry(
+    total=1, connect=0, read=0, other=0, status=1, status_forcelist=(429,),
+    backoff_factor=0.5, raise_on_status=False,
+))
+# Elevation: never retried, so ELEVATION_TIMEOUT really bounds each request (urllib3 would
+# otherwise retry connect/read timeouts and sleep out Retry-After before the breaker sees a failure).
+ELEVATION_SESSION = make_session(Retry(total=0, raise_on_status=False))
+
+# ---------- Browser pool ----------
+CHROME_BINARY = '/root/chrome-linux/chrome'
+# Each Earth tab holds roughly a gigabyte (WebGL context + tile cache); more instances than
+# memory allows just swap or get OOM-killed, so the pool is capped at one per GB.
+CHROME_INSTANCE_BYTES = 1024 * 1024 * 1024
+
+def available_memory() -> Optional[int]:
+    """Bytes this container may use: the cgroup limit when set, else physical RAM."""
     try:
-        r = requests.get(OPEN_ELEVATION_URL, params={"locations": f"{lat},{lon}"}, timeout=20)
-        if r.ok:
-            res = r.json().get("results") or []
-            if res:
-                return float(res[0].get("elevation"))
-    except Exception:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            return int(f.read())
+    except (OSError, ValueError):
         pass
-    # Fallback: Open-Meteo elevation API
     try:
-        r = requests.get(OPEN_METEO_ELEVATION_URL, params={"latitude": lat, "longitude": lon}, timeout=20)
-        if r.ok:
-            elevations = r.json().get("elevation") or []
-            if elevations:
-                return float(elevations[0])
-    except Exception:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (OSError, ValueError):
+        return None
+
+# Number of headless Chrome instances kept warm; views are captured concurrently across them.
+POOL_SIZE = max(1, int(os.getenv("EARTHSHOT_POOL_SIZE", "2")))
+_memory = available_memory()
+if _memory:
+    POOL_SIZE = max(1, min(POOL_SIZE, _memory // CHROME_INSTANCE_BYTES))
+# Recycle an instance after this many captures so long-lived WebGL state can't drift.
+MAX_USES_PER_INSTANCE = max(1, int(os.getenv("EARTHSHOT_MAX_USES", "50")))
+# Per-slot HTTP cache so tiles fetched for one view are served locally to the next.
+CHROME_CACHE_DIR = os.getenv("EARTHSHOT_CHROME_CACHE", "/tmp/earthshot-chrome-cache")
+CHROME_CACHE_BYTES = 512 * 1024 * 1024
+# Finished views keyed by everything that determines them (URL, viewport, crop, format)
+SHOT_CACHE_DIR = os.getenv("EARTHSHOT_SHOT_CACHE", "/tmp/earthshot-shot-cache")
+SHOT_CACHE_BYTES = 500 * 1024 * 1024
+# Earth's imagery and 3D tiles are updated over time; older captures are rendered again.
+SHOT_CACHE_MAX_AGE_SECONDS = float(os.getenv("EARTHSHOT_SHOT_CACHE_DAYS", "7")) * 86400
+# Persistent per-slot profiles keep Earth's JS/wasm bundle cached across respawns and restarts.
+CHROME_PROFILE_DIR = os.path.expanduser(os.getenv("EARTHSHOT_CHROME_PROFILE", "~/.cache/earthshot/chrome"))
+# Subsystems a headless screenshotter never needs; they only cost startup time and background CPU.
+CHROME_FLAGS = [
+    '--headless=new',
+    '--no-sandbox',
+    # Containers often mount a 64 MB /dev/shm; renderers that outgrow it crash mid-capture
+    '--disable-dev-shm-usage',
+    '--no-first-run',
+    '--no-default-browser-check',
+    # A renderer busy compiling shaders under SwiftShader is slow, not hung
+    '--disable-hang-monitor',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-sync',
+    '--disable-default-apps',
+    '--metrics-recording-only',
+    '--mute-audio',
+    # One combined list: Chrome only honours the last --disable-features flag. Occlusion
+    # tracking would otherwise let Chrome skip painting instances it considers hidden.
+    '--disable-features=TranslateUI,BackForwardCache,CalculateNativeWinOcclusion',
+]
+# Telemetry/ads fetched by Earth pages that only compete with tile bandwidth. Imagery
+# (kh.google.com, khms*.googleapis.com) and fonts (used for globe labels) stay allowed.
+BLOCKED_URL_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*play.google.com/log*",
+]
+# Earth's globe is WebGL: render through ANGLE on the host GPU when there is one (EARTHSHOT_GPU=1),
+# otherwise through ANGLE's SwiftShader rasteriser, which recent Chrome only enables on request.
+# Long-lived ANGLE contexts leak memory; MAX_USES_PER_INSTANCE recycling bounds that.
+if os.getenv("EARTHSHOT_GPU") == "1":
+    CHROME_FLAGS += ['--use-gl=angle', '--use-angle=gl-egl']
+else:
+    CHROME_FLAGS += ['--use-gl=angle', '--use-angle=swiftshader', '--enable-unsafe-swiftshader']
+
+# ---------- Cache ----------
+# Geocode/elevation answers are memoised in-process and mirrored to a JSON sidecar,
+# so repeated addresses skip the rate-limited public APIs across restarts.
+CACHE_PATH = os.path.expanduser(os.getenv("EARTHSHOT_CACHE", "~/.cache/earthshot/geo.json"))
+# Geocoder answers drift as map data is edited; entries older than this are fetched again.
+CACHE_TTL_SECONDS = float(os.getenv("EARTHSHOT_CACHE_TTL_DAYS", "30")) * 86400
+_cache_lock = threading.Lock()
+_cache: Optional[dict] = None
+
+def _read_cache_file() -> dict:
+    try:
+        with open(CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _load_cache() -> dict:
+    global _cache
+    if _cache is None:
+        _cache = _read_cache_file()
+    return _cache
+
+def _fresh(entry: Any, now: float) -> bool:
+    # Entries are {"v": value, "ts": stored_at}; anything else predates the TTL and is stale
+    return isinstance(entry, dict) and now - entry.get("ts", 0) < CACHE_TTL_SECONDS
+
+def cache_get(key: str) -> Any:
+    with _cache_lock:
+        entry = _load_cache().get(key)
+        return entry["v"] if _fresh(entry, time.time()) else None
+
+def cache_put(key: str, value: Any) -> None:
+    with _cache_lock:
+        cache = _load_cache()
+        now = time.time()
+        entry = cache[key] = {"v": value, "ts": now}
+        try:
+            os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+            # Other processes may share the sidecar: under an exclusive lock, write only this
+            # key over their entries (the rest of our copy may be older than what they stored)
+            with open(f"{CACHE_PATH}.lock", "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                merged = _read_cache_file()
+                merged[key] = entry
+                merged = {k: e for k, e in merged.items() if _fresh(e, now)}
+                cache.clear()
+                cache.update(merged)
+                tmp_path = f"{CACHE_PATH}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(merged, f)
+                os.replace(tmp_path, CACHE_PATH)
+        except OSError:
+            pass
+
+def disk_cached(namespace: str, key: Callable[..., str]):
+    """Memoise non-None results of fn under f"{namespace}:{key(*args)}"."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args):
+            cache_key = f"{namespace}:{key(*args)}"
+            hit = cache_get(cache_key)
+            if hit is not None:
+                # JSON has no tuples; geocoders return (lat, lon, label)
+                return tuple(hit) if isinstance(hit, list) else hit
+            res = fn(*args)
+            if res is not None:
+                cache_put(cache_key, res)
+            return res
+        return wrapper
+    return decorator
+
+
+# ---------- Utils ----------
+class RateLimiter:
+    """Space requests to one host at least min_interval apart across threads.
+
+    Only the remainder of the interval is waited out, so occasional calls never sleep.
+    Staying under a public API's limit is cheaper than the 429s and retry backoff past it.
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._last = float("-inf")
+
+    def __enter__(self) -> "RateLimiter":
+        with self._lock:
+            wait = self.min_interval - (time.monotonic() - self._last)
+            if wait > 0:
+                time.sleep(wait)
+            self._last = time.monotonic()
+        return self
+
+    def __exit__(self, *exc) -> None:
         pass
-    return None
 
-def build_earth_url_with_search(address: str, lat: float, lon: float,
-                                a: float, d: float, y: float, h: float, t: float, r: float = 0.0) -> str:
+# Nominatim's usage policy: at most one request per second. Open-Elevation's public
+# instance throttles bursts too.
+NOMINATIM_LIMIT = RateLimiter(1.0)
+OPEN_ELEVATION_LIMIT = RateLimiter(0.5)
+
+# Elevation only refines the camera altitude, so a degraded service must not stall predict():
+# short timeouts, and after repeated failures stop calling it for a while (default_alt is used).
+ELEVATION_TIMEOUT = 3
+ELEVATION_BREAKER_FAILURES = 2
+ELEVATION_BREAKER_SECONDS = 300.0
+_elevation_breaker = {"failures": 0, "open_until": 0.0}
+# Concurrent predictions update the breaker together
+_elevation_breaker_lock = threading.Lock()
+
+def elevation_cache_key(lat: float, lon: float) -> str:
+    return f"elevation:{lat:.5f},{lon:.5f}"
+
+def get_elevations_batch(points: List[Tuple[float, float]]) -> List[Optional[float]]:
+    """Elevations for many (lat, lon) points with one request per service; None where unknown."""
+    elevations: List[Optional[float]] = [cache_get(elevation_cache_key(lat, lon)) for lat, lon in points]
+    fetched = missing = [i for i, e in enumerate(elevations) if e is None]
+    if missing:
+        with _elevation_breaker_lock:
+            if time.monotonic() < _elevation_breaker["open_until"]:
+                return elevations
+    if missing:
+        try:
+            locations = [{"latitude": points[i][0], "longitude": points[i][1]} for i in missing]
+            with OPEN_ELEVATION_LIMIT:
+                r = ELEVATION_SESSION.post(OPEN_ELEVATION_URL, json={"locations": locations}, timeout=ELEVATION_TIMEOUT)
+            if r.ok:
+                res = r.json().get("results") or []
+                if len(res) == len(missing):
+                    for i, hit in zip(missing, res):
+                        if hit.get("elevation") is not None:
+                            elevations[i] = float(hit["elevation"])
+        except Exception:
+            pass
+    # Fallback: Open-Meteo elevation API (comma-separated coordinate lists)
+    missing = [i for i, e in enumerate(elevations) if e is None]
+    if missing:
+        try:
+            params = {
+                "latitude": ",".join(str(points[i][0]) for i in missing),
+                "longitude": ",".join(str(points[i][1]) for i in missing),
+            }
+            r = ELEVATION_SESSION.get(OPEN_METEO_ELEVATION_URL, params=params, timeout=ELEVATION_TIMEOUT)
+            if r.ok:
+                res = r.json().get("elevation") or []
+                if len(res) == len(missing):
+                    for i, elev in zip(missing, res):
+                        if elev is not None:
+                            elevations[i] = float(elev)
+        except Exception:
+            pass
+    for i in fetched:
+        if elevations[i] is not None:
+            cache_put(elevation_cache_key(*points[i]), elevations[i])
+    if fetched:
+        with _elevation_breaker_lock:
+            if any(elevations[i] is None for i in fetched):
+                _elevation_breaker["failures"] += 1
+                if _elevation_breaker["failures"] >= ELEVATION_BREAKER_FAILURES:
+                    _elevation_breaker["open_until"] = time.monotonic() + ELEVATION_BREAKER_SECONDS
+                    _elevation_breaker["failures"] = 0
+            else:
+                _elevation_breaker["failures"] = 0
+    return elevations
+
+def get_elevation_open_elevation(lat: float, lon: float) -> Optional[float]:
+    return get_elevations_batch([(lat, lon)])[0]
+
+def build_earth_url_prefix(address: str, lat: float, lon: float) -> str:
+    """The part of an Earth URL that is constant for a target: search query and look-at point."""
     addr = quote_plus(address) if address else ""
-    return (f"https://earth.google.com/web/search/{addr}/"
-            f"@{lat:.7f},{lon:.7f},{a:.1f}a,{d:.1f}d,{y:.2f}y,{h:.3f}h,{t:.3f}t,{r:.1f}r")
+    return f"https://earth.google.com/web/search/{addr}/@{lat:.7f},{lon:.7f},"
 
-def center_crop(image_path: str, output_path: str, crop_margin: float) -> None:
+# Camera tail of an Earth URL: altitude, distance, fov, heading, tilt, roll
+EARTH_CAMERA_FMT = "%.1fa,%.1fd,%.2fy,%.3fh,%.3ft,%.1fr"
+
+def build_earth_url_from_prefix(prefix: str, a: float, d: float, y: float, h: float, t: float, r: float = 0.0) -> str:
+    return prefix + EARTH_CAMERA_FMT % (a, d, y, h, t, r)
+
+def crop_box(w: int, h: int, crop_margin: float) -> Tuple[int, int, int, int]:
+    """(left, top, right, bottom) of the centre region left after trimming crop_margin per side."""
     crop_margin = max(0.0, min(0.49, float(crop_margin)))
-    with Image.open(image_path) as im:
-        w, h = im.size
-        left, right = int(w * crop_margin), int(w * (1.0 - crop_margin))
-        top, bottom = int(h * crop_margin), int(h * (1.0 - crop_margin))
-        im.crop((left, top, right, bottom)).save(output_path)
+    left, right = int(w * crop_margin), int(w * (1.0 - crop_margin))
+    top, bottom = int(h * crop_margin), int(h * (1.0 - crop_margin))
+    return left, top, right, bottom
 
-def try_parse_latlon(text: str) -> Optional[Tuple[float, float]]:
+# Output encodings: Input value -> (file extension, extra PIL save options).
+# Aerial imagery is ~10x smaller as JPEG/WebP and much cheaper to encode than PNG's zlib.
+OUTPUT_QUALITY = 88
+OUTPUT_FORMATS = {
+    # Views are short-lived downloads: the fastest zlib level costs little in size
+    "png": ("png", {"compress_level": 1}),
+    "jpeg": ("jpg", {"quality": OUTPUT_QUALITY, "optimize": False}),
+    "webp": ("webp", {"quality": OUTPUT_QUALITY, "method": 0}),
+}
+
+def center_crop(image: Union[str, BinaryIO], output_path: str, crop_margin: float, fmt: str = "png") -> None:
+    with Image.open(image) as im:
+        cropped = im.crop(crop_box(im.width, im.height, crop_margin))
+        if fmt != "png":
+            cropped = cropped.convert("RGB")
+        cropped.save(output_path, format=fmt.upper(), **OUTPUT_FORMATS[fmt][1])
+
+def profile_lock_is_live(profile_dir: str) -> bool:
+    """Whether a Chrome may still own this profile, per its SingletonLock (-> "<host>-<pid>")."""
+    try:
+        target = os.readlink(os.path.join(profile_dir, "SingletonLock"))
+    except OSError:
+        return False
+    host, _, pid = target.rpartition("-")
+    if host != socket.gethostname() or not pid.isdigit():
+        return True  # another host's (or an unreadable) lock can't be checked: assume it's held
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # EPERM: the process exists
+    return True
+
+def profile_dir_for(slot: int, debug: bool = True) -> str:
+    """Per-slot Chrome profile directory, ready for launch."""
+    profile_dir = os.path.join(CHROME_PROFILE_DIR, str(slot))
     try:
-        parts = [p.strip() for p in text.split(",")]
-        if len(parts) == 2:
-            return float(parts[0]), float(parts[1])
+        os.makedirs(profile_dir, exist_ok=True)
+    except OSError as e:
+        # Read-only or foreign-owned home: a temp profile only loses cross-restart warmth
+        fallback = os.path.join(tempfile.gettempdir(), "earthshot-chrome", str(slot))
+        if debug:
+            print(f"Chrome profile dir {profile_dir} unusable ({e}); using {fallback}", flush=True)
+        profile_dir = fallback
+        os.makedirs(profile_dir, exist_ok=True)
+    if profile_lock_is_live(profile_dir):
+        # Another predictor sharing this HOME runs a Chrome on the slot: take a profile of our own
+        profile_dir = f"{profile_dir}-{os.getpid()}"
+        os.makedirs(profile_dir, exist_ok=True)
+    if not profile_lock_is_live(profile_dir):
+        # A Chrome that exited uncleanly leaves its singleton links behind, and a new
+        # instance would refuse the profile; the lock's owner is gone, so they are stale.
+        for name in ("SingletonLock", "SingletonSocket", "SingletonCookie"):
+            path = os.path.join(profile_dir, name)
+            if os.path.lexists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    return profile_dir
+
+def set_viewport(browser: webdriver.Chrome, w: int, h: int) -> None:
+    """Make the page render at exactly w x h CSS pixels at 1x scale."""
+    # Window sizes include whatever frame the platform adds and inherit the host's DPI; the
+    # emulated viewport is exact, so the GPU rasterises and Chrome encodes no extra pixels.
+    try:
+        browser.execute_cdp_cmd(
+            "Emulation.setDeviceMetricsOverride",
+            {"width": w, "height": h, "deviceScaleFactor": 1, "mobile": False}
+        )
+    except Exception:
+        browser.set_window_size(w, h)
+
+def center_clip(browser: webdriver.Chrome, crop_margin: float) -> dict:
+    """CDP clip rectangle for the centre crop of the browser's current viewport."""
+    # Measured rather than derived from the window size: headless viewports can be smaller
+    vw, vh = browser.execute_script("return [window.innerWidth, window.innerHeight];")
+    left, top, right, bottom = crop_box(vw, vh, crop_margin)
+    return {"x": left, "y": top, "width": right - left, "height": bottom - top, "scale": 1}
+
+def screenshot_center(browser: webdriver.Chrome, clip: dict, fmt: str = "png") -> bytes:
+    """Have Chrome encode only the centre crop, skipping the full-frame PNG round-trip through PIL."""
+    # optimizeForSpeed skips Chrome's slowest (max-compression) encoder settings
+    params = {"format": fmt, "clip": clip, "optimizeForSpeed": True}
+    if fmt != "png":
+        params["quality"] = OUTPUT_QUALITY
+    res = browser.execute_cdp_cmd("Page.captureScreenshot", params)
+    return base64.b64decode(res["data"])
+
+def write_view(data: bytes, output_path: str, crop_margin: Optional[float], fmt: str = "png") -> str:
+    """Persist a captured view, center-cropping and encoding it first unless Chrome already did."""
+    # No margin to trim off a PNG screenshot: it already is the output
+    if crop_margin is None or (crop_margin <= 0 and fmt == "png"):
+        with open(output_path, "wb") as f:
+            f.write(data)
+    else:
+        center_crop(io.BytesIO(data), output_path, crop_margin, fmt)
+    return output_path
+
+# Shot cache: a camera URL (one with an @lat,lon,... view, not a bare search) pins the view
+# exactly, so re-rendering it with the same size, crop, format and wait budget would only
+# reproduce the same image. mtime is when the view was captured (for the max age);
+# atime is set explicitly on each hit and orders LRU eviction.
+def shot_cache_path(url: str, w: int, h: int, crop_margin: float, fmt: str, wait_seconds: int) -> str:
+    key = hashlib.blake2b(
+        f"{url}|{w}x{h}|{crop_margin}|{fmt}|{wait_seconds}".encode(), digest_size=8
+    ).hexdigest()
+    return os.path.join(SHOT_CACHE_DIR, f"{key}.{OUTPUT_FORMATS[fmt][0]}")
+
+def shot_cache_load(cached: str, output_path: str) -> Optional[str]:
+    """Copy a cached view to `output_path`; None on a miss or an expired entry."""
+    try:
+        st = os.stat(cached)
+        now = time.time()
+        if now - st.st_mtime > SHOT_CACHE_MAX_AGE_SECONDS:
+            os.remove(cached)
+            return None
+        shutil.copyfile(cached, output_path)
+        # Explicit atime update: relatime/noatime mounts wouldn't record the read
+        os.utime(cached, (now, st.st_mtime))
+    except OSError:
+        return None
+    return output_path
+
+def shot_cache_store(output_path: str, cached: str, debug: bool = False) -> None:
+    """Add a finished view to the shot cache, evicting least-recently-used views past SHOT_CACHE_BYTES."""
+    try:
+        os.makedirs(SHOT_CACHE_DIR, exist_ok=True)
+        tmp = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(output_path, tmp)
+        os.replace(tmp, cached)
+        entries = []
+        with os.scandir(SHOT_CACHE_DIR) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    st = entry.stat()
+                    entries.append((max(st.st_atime, st.st_mtime), st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= SHOT_CACHE_BYTES:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+    except OSError as e:
+        if debug:
+            print(f"[ShotCache] store failed: {e}", flush=True)
+
+def write_and_cache_view(
+    data: bytes, output_path: str, crop_margin: Optional[float], fmt: str, cached: str, debug: bool = False
+) -> str:
+    write_view(data, output_path, crop_margin, fmt)
+    shot_cache_store(output_path, cached, debug)
+    return output_path
+
+# Earth Web is a single-page app that routes on its URL: rewrite it in place and let the
+# router fly the camera, reusing the warm WebGL context and tile cache instead of reloading.
+FLY_TO_JS = """
+history.pushState(null, '', arguments[0]);
+window.dispatchEvent(new PopStateEvent('popstate', {state: null}));
+"""
+
+def fly_to(browser: webdriver.Chrome, url: str) -> bool:
+    """Ask an already-loaded Earth page to move to `url` without a document reload.
+
+    True only means the URL was pushed; confirm_flight() checks that Earth acted on it.
+    """
+    try:
+        if not browser.current_url.startswith(EARTH_WEB_URL):
+            return False
+        browser.execute_script(FLY_TO_JS, url)
+        return True
+    except Exception:
+        return False
+
+# A router that ignores the synthetic popstate leaves the old view on screen with a quiet
+# network, which would pass as settled; a real flight starts fetching within this window.
+FLY_TO_CONFIRM_SECONDS = 2.0
+
+def confirm_flight(browser: webdriver.Chrome, timeout: float) -> Optional[list]:
+    """Performance-log entries read while waiting for the flight's first request; None if none came."""
+    entries = []
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            batch = browser.get_log("performance")
+        except Exception:
+            return None
+        entries += batch
+        if any('"Network.requestWillBeSent"' in entry["message"] for entry in batch):
+            return entries
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(SCENE_POLL_SECONDS)
+
+# Scene readiness: Earth streams imagery tiles until the view converges, so the page is
+# "ready" once a canvas exists and no request has been in flight for a quiet window.
+# In-flight requests are tracked from the CDP Network events in Chrome's performance log.
+SCENE_POLL_SECONDS = 0.1
+SCENE_QUIET_SECONDS = 0.8
+# Requests pending longer than this are long-polls/streams, not tiles still loading.
+STALLED_REQUEST_SECONDS = 10.0
+# Network-idle only means the tiles arrived; also require the page to paint a few frames
+# after that, so decoded imagery has reached the canvas (and a stalled renderer times out).
+SCENE_QUIET_FRAMES = 5
+# Upper bound for the setup() warm-up load of each pool instance.
+WARM_UP_SECONDS = 30
+# With no scene wait requested, a full navigation still waits (up to this) for the load
+# event, which get() no longer blocks on under the eager load strategy.
+PAGE_LOAD_SECONDS = 30
+# Frames painted so far, counted by an injected requestAnimationFrame loop; -1 until a canvas exists.
+FRAME_COUNT_JS = """
+if (!document.querySelector('canvas')) return -1;
+if (window.__earthshotFrames === undefined) {
+  window.__earthshotFrames = 0;
+  (function tick() { window.__earthshotFrames++; requestAnimationFrame(tick); })();
+}
+return window.__earthshotFrames;
+"""
+
+def drain_network_log(browser: webdriver.Chrome) -> None:
+    """Discard buffered performance-log events so the next wait only sees fresh requests."""
+    try:
+        browser.get_log("performance")
     except Exception:
         pass
-    return None
+
+def wait_for_load(browser: webdriver.Chrome, timeout: float) -> bool:
+    """Poll until document.readyState is 'complete'. False on timeout."""
+    try:
+        WebDriverWait(
+            browser, timeout, poll_frequency=SCENE_POLL_SECONDS, ignored_exceptions=(JavascriptException,)
+        ).until(lambda driver: driver.execute_script("return document.readyState === 'complete';"))
+    except TimeoutException:
+        return False
+    return True
+
+def wait_for_scene(browser: webdriver.Chrome, timeout: float, backlog: Optional[list] = None) -> Optional[float]:
+    """Poll until the network goes idle over a painting canvas. Returns seconds waited, or None on timeout.
+
+    `backlog` holds performance-log entries a caller already drained, so their requests still count.
+    """
+    quiet_polls = math.ceil(SCENE_QUIET_SECONDS / SCENE_POLL_SECONDS)
+    pending = {}
+    state = {"quiet": 0, "frames": 0}
+    backlog = list(backlog or [])
+
+    def settled(driver) -> bool:
+        now = time.monotonic()
+        entries = backlog + driver.get_log("performance")
+        backlog.clear()
+        for entry in entries:
+            msg = json.loads(entry["message"])["message"]
+            method, params = msg.get("method"), msg.get("params", {})
+            if method == "Network.requestWillBeSent":
+                pending.setdefault(params.get("requestId"), now)
+            elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                pending.pop(params.get("requestId"), None)
+        busy = any(now - started < STALLED_REQUEST_SECONDS for started in pending.values())
+        frames = -1 if busy else driver.execute_script(FRAME_COUNT_JS)
+        if frames < 0:
+            state["quiet"] = 0
+            return False
+        if state["quiet"] == 0:
+            state["frames"] = frames
+        state["quiet"] += 1
+        return state["quiet"] >= quiet_polls and frames - state["frames"] >= SCENE_QUIET_FRAMES
+
+    start = time.monotonic()
+    try:
+        # A script can fail while the page is mid-navigation; just poll again
+        WebDriverWait(
+            browser, timeout, poll_frequency=SCENE_POLL_SECONDS, ignored_exceptions=(JavascriptException,)
+        ).until(settled)
+    except TimeoutException:
+        return None
+    return time.monotonic() - start
+
+# "lat,lon" typed in place of an address; anything else goes to the geocoders
+LATLON_RE = re.compile(r"\s*([-+]?(?:\d+\.?\d*|\.\d+))\s*,\s*([-+]?(?:\d+\.?\d*|\.\d+))\s*")
+
+def try_parse_latlon(text: str) -> Optional[Tuple[float, float]]:
+    m = LATLON_RE.fullmatch(text or "")
+    return (float(m.group(1)), float(m.group(2))) if m else None
 
 # ---------- Geocoding ----------
+# Providers are tried in priority order (Google is billed), so a slow one must fail fast.
+GEOCODE_TIMEOUT = 5
+
+# Every provider's hits go through the geo cache, keyed on the normalised address.
+def address_cache_key(address: str, *_) -> str:
+    return address.strip().lower()
+
+@disk_cached("open_meteo", address_cache_key)
 def geocode_open_meteo(address: str) -> Optional[Tuple[float, float, str]]:
     """Primary free geocoder (no key). Returns (lat, lon, label) or None."""
     if not address:
         return None
     params = {"name": address, "count": 1, "language": "en", "format": "json"}
-    r = requests.get(OPEN_METEO_GEOCODE_URL, params=params, timeout=20)
+    r = SESSION.get(OPEN_METEO_GEOCODE_URL, params=params, timeout=GEOCODE_TIMEOUT)
     if not r.ok:
         return None
     js = r.json() or {}
@@ -85,14 +644,14 @@ def geocode_open_meteo(address: str) -> Optional[Tuple[float, float, str]]:
     label = ", ".join([p for p in [hit.get("name"), hit.get("admin1"), hit.get("country_code")] if p])
     return lat, lon, label
 
+@disk_cached("nominatim", address_cache_key)
 def geocode_nominatim(address: str) -> Optional[Tuple[float, float, str]]:
     """Fallback free geocoder (keyless). Respect Nominatim's UA policy."""
     if not address:
         return None
-    ua = os.getenv("GEOCODER_UA", "videotour-geocoder/1.0 (+https://example.com)")
-    headers = {"User-Agent": ua}
     params = {"q": address, "format": "json", "limit": 1}
-    r = requests.get(NOMINATIM_URL, params=params, headers=headers, timeout=20)
+    with NOMINATIM_LIMIT:
+        r = SESSION.get(NOMINATIM_URL, params=params, timeout=GEOCODE_TIMEOUT)
     if not r.ok:
         return None
     arr = r.json() or []
@@ -105,13 +664,14 @@ def geocode_nominatim(address: str) -> Optional[Tuple[float, float, str]]:
     return lat, lon, label
 
 # Updated: Accepts an api_key parameter
+@disk_cached("google", address_cache_key)
 def geocode_google(address: str, api_key: Optional[str]) -> Optional[Tuple[float, float, str]]:
     """Final fallback geocoder using Google Maps API."""
     if not address or not api_key:
         return None
         
     params = {"address": address, "key": api_key}
-    r = requests.get(GOOGLE_GEOCODE_URL, params=params, timeout=20)
+    r = SESSION.get(GOOGLE_GEOCODE_URL, params=params, timeout=GEOCODE_TIMEOUT)
     if not r.ok:
         return None
         
@@ -126,7 +686,9 @@ def geocode_google(address: str, api_key: Optional[str]) -> Optional[Tuple[float
     return lat, lon, label
 
 # Updated: Accepts and passes along the api_key
-def geocode_address(address: str, api_key: Optional[str]) -> Tuple[Optional[float], Optional[float], str]:
+def geocode_address(
+    address: str, api_key: Optional[str], debug: bool = False
+) -> Tuple[Optional[float], Optional[float], str]:
     """Resolve address → (lat, lon, label). Tries Open-Meteo, Nominatim, then Google."""
     # Accept "lat,lon" directly
     parsed = try_parse_latlon(address)
@@ -134,17 +696,24 @@ def geocode_address(address: str, api_key: Optional[str]) -> Tuple[Optional[floa
         lat, lon = parsed
         return lat, lon, f"{lat:.6f}, {lon:.6f}"
 
-    # Try services in order
-    res = geocode_open_meteo(address)
-    if res:
-        return res
-    res = geocode_nominatim(address)
-    if res:
-        return res
-    res = geocode_google(address, api_key)
-    if res:
-        return res
-        
+    # Try services in order; one that errors or times out just hands over to the next
+    providers = (
+        ("Open-Meteo", geocode_open_meteo, (address,)),
+        ("Nominatim", geocode_nominatim, (address,)),
+        ("Google", geocode_google, (address, api_key)),
+    )
+    for name, geocode, args in providers:
+        try:
+            res = geocode(*args)
+        except Exception as e:
+            # Only the exception type: requests' messages embed the request URL, and
+            # Google's carries the API key in its query string
+            if debug:
+                print(f"[Geocoding] {name} failed: {type(e).__name__}", flush=True)
+            continue
+        if res:
+            return res
+
     # If all fail, return None for coords
     return None, None, address
 
@@ -153,50 +722,221 @@ def geocode_address(address: str, api_key: Optional[str]) -> Tuple[Optional[floa
 class Predictor(BasePredictor):
     def setup(self) -> None:
         """Load the model into memory to make running multiple predictions efficient"""
+        self._uses = {}
+        # browser -> ((w, h, crop_margin), clip); the viewport only changes with the window size
+        self._clips = {}
+        # browser -> (w, h) last applied, so repeat sizes skip the resize round-trip
+        self._viewports = {}
+        self._free = queue.Queue()
+        # Decoding/cropping/writing screenshots runs here so browsers return to the pool sooner
+        self._encode_pool = ThreadPoolExecutor(max_workers=2)
+        # Relaunches recycled instances in the background while a prediction geocodes
+        self._spawner = ThreadPoolExecutor(max_workers=1)
+        self._last_out_dir: Optional[str] = None
+        # chromedriver path resolved by Selenium Manager for the first browser, reused afterwards
+        self._driver_path: Optional[str] = None
+        browsers = [self._make_browser(slot) for slot in range(POOL_SIZE)]
+        # Load Earth once per instance so the first real view starts from warm caches
+        with ThreadPoolExecutor(max_workers=POOL_SIZE) as executor:
+            list(executor.map(self._warm_up, browsers))
+        for slot, browser in enumerate(browsers):
+            self._free.put((slot, browser))
+
+    def _warm_up(self, browser: webdriver.Chrome) -> None:
+        try:
+            browser.get(EARTH_WEB_URL)
+            # get() returns at DOMContentLoaded (eager load strategy); the bundle, WebGL init,
+            # shader compiles and first tiles come after it and should be paid here, not by the first view
+            if wait_for_scene(browser, WARM_UP_SECONDS) is None:
+                print(f"Warm-up scene still loading after {WARM_UP_SECONDS}s", flush=True)
+        except Exception as e:
+            print(f"Warm-up load of {EARTH_WEB_URL} failed: {e}", flush=True)
+
+    def _make_browser(self, slot: int, debug: bool = True) -> webdriver.Chrome:
+        """Launch a pool instance; `debug` gates its log lines (setup() always logs)."""
         options = webdriver.ChromeOptions()
-        options.binary_location = '/root/chrome-linux/chrome'
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        self.browser = webdriver.Chrome(options=options)
+        options.binary_location = CHROME_BINARY
+        # get() returns at DOMContentLoaded; wait_for_scene already waits out the rest of the
+        # load (it sees every request since the log was drained), within the wait budget
+        options.page_load_strategy = 'eager'
+        for flag in CHROME_FLAGS:
+            options.add_argument(flag)
+        # Concurrent Chrome processes must not share a profile or cache directory
+        profile_dir = profile_dir_for(slot, debug)
+        options.add_argument(f'--user-data-dir={profile_dir}')
+        options.add_argument(f'--disk-cache-dir={CHROME_CACHE_DIR}/{slot}')
+        options.add_argument(f'--disk-cache-size={CHROME_CACHE_BYTES}')
+        # Network events feed the in-flight request counter in wait_for_scene
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+        # An explicit driver path skips the Selenium Manager subprocess (and its version
+        # check) that would otherwise run on every launch, including each recycle.
+        browser = webdriver.Chrome(options=options, service=Service(executable_path=self._driver_path))
+        self._driver_path = browser.service.path
+        try:
+            browser.execute_cdp_cmd("Network.enable", {})
+            browser.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            if debug:
+                print(f"Could not install URL blocklist: {e}", flush=True)
+        self._uses[browser] = 0
+        return browser
+
+    def _release_browser(self, slot: int, browser: webdriver.Chrome, healthy: bool) -> None:
+        """Return a browser to the pool, recycling it if worn out or broken."""
+        self._uses[browser] += 1
+        if healthy and self._uses[browser] < MAX_USES_PER_INSTANCE:
+            self._free.put((slot, browser))
+            return
+        self._uses.pop(browser, None)
+        self._clips.pop(browser, None)
+        self._viewports.pop(browser, None)
+        try:
+            browser.quit()
+        except Exception:
+            pass
+        # Empty slot: the next checkout launches a fresh instance.
+        self._free.put((slot, None))
+
+    def _respawn_idle(self, debug: bool = True) -> None:
+        """Relaunch recycled (empty) pool slots ahead of the captures that would otherwise pay for it."""
+        # Only empty slots are held while Chrome launches; live browsers go straight back so
+        # captures starting meanwhile never wait behind a relaunch.
+        empty = []
+        for _ in range(self._free.qsize()):
+            try:
+                slot, browser = self._free.get_nowait()
+            except queue.Empty:
+                break
+            if browser is None:
+                empty.append(slot)
+            else:
+                self._free.put((slot, browser))
+        for slot in empty:
+            browser = None
+            try:
+                browser = self._make_browser(slot, debug=debug)
+            except Exception as e:
+                if debug:
+                    print(f"Background relaunch of browser {slot} failed: {e}", flush=True)
+            self._free.put((slot, browser))
+
+    def _capture(
+        self, url: str, out_path: str, w: int, h: int, wait_until: int, crop_margin: float, output_format: str,
+        index: int, debug: bool, soft_nav: bool, reuse_shots: bool = False
+    ) -> "Future[str]":
+        """Check a browser out of the pool, capture `url`, and hand the browser back."""
+        cached = shot_cache_path(url, w, h, crop_margin, output_format, wait_until) if reuse_shots else None
+        if cached and shot_cache_load(cached, out_path):
+            if debug:
+                print(f"[View {index:02d}] Reusing cached capture {os.path.basename(cached)}", flush=True)
+            done: "Future[str]" = Future()
+            done.set_result(out_path)
+            return done
+
+        slot, browser = self._free.get()
+        if browser is None:
+            try:
+                browser = self._make_browser(slot, debug=debug)
+            except Exception:
+                self._free.put((slot, None))
+                raise
+        healthy = False
+        try:
+            written = self._open_and_capture(
+                browser, url, out_path, w, h, wait_until, crop_margin, output_format,
+                index=index, debug=debug, soft_nav=soft_nav, cache_path=cached
+            )
+            healthy = True
+            return written
+        finally:
+            self._release_browser(slot, browser, healthy)
+
+    def _clip_for(self, browser: webdriver.Chrome, w: int, h: int, crop_margin: float) -> dict:
+        key = (w, h, crop_margin)
+        cached = self._clips.get(browser)
+        if cached is None or cached[0] != key:
+            cached = self._clips[browser] = (key, center_clip(browser, crop_margin))
+        return cached[1]
 
     # open page + screenshot helper
-    def _open_and_capture_new_tab(
+    def _open_and_capture(
         self,
+        browser: webdriver.Chrome,
         url: str,
+        out_path: str,
         w: int,
         h: int,
         wait_until: int,
+        crop_margin: float,
+        output_format: str = "png",
         index: int = 1,
-        debug: bool = True
-    ) -> str:
-        self.browser.set_window_size(w, h)
-        self.browser.get(url)
+        debug: bool = True,
+        soft_nav: bool = False,
+        cache_path: Optional[str] = None
+    ) -> "Future[str]":
+        if self._viewports.get(browser) != (w, h):
+            set_viewport(browser, w, h)
+            self._viewports[browser] = (w, h)
+        drain_network_log(browser)
+        # Warm browsers fly the camera in-page; fall back to a full load otherwise
+        flew, backlog = False, None
+        if soft_nav and fly_to(browser, url):
+            backlog = confirm_flight(browser, FLY_TO_CONFIRM_SECONDS)
+            flew = backlog is not None
+            if debug:
+                if flew:
+                    print(f"[View {index:02d}] Flew camera in-page", flush=True)
+                else:
+                    print(f"[View {index:02d}] In-page flight didn't start; reloading", flush=True)
+            if not flew:
+                drain_network_log(browser)
+        if not flew:
+            browser.get(url)
 
-        # 1. Wait for the page to load (User defined wait time)
+        # 1. Wait for the scene to settle (wait_until is the upper bound)
+        waited = None
         if wait_until > 0:
-            for i in range(wait_until):
-                if debug:
-                    print(f"Elapsed time: {i+1}/{wait_until} seconds", flush=True)
-                time.sleep(1)
+            waited = wait_for_scene(browser, wait_until, backlog)
+            if debug:
+                if waited is None:
+                    print(f"[View {index:02d}] Scene still loading after {wait_until}s; capturing anyway", flush=True)
+                else:
+                    print(f"[View {index:02d}] Scene settled after {waited:.1f}s", flush=True)
+        elif not flew and not wait_for_load(browser, PAGE_LOAD_SECONDS) and debug:
+            print(f"[View {index:02d}] Page still loading after {PAGE_LOAD_SECONDS}s; capturing anyway", flush=True)
 
         # 2. Dismiss Pop-ups (Once at the end)
         try:
             if debug:
-                print("Sending ESCAPE key to dismiss popups...", flush=True)
-            ActionChains(self.browser).send_keys(Keys.ESCAPE).perform()
+                print(f"[View {index:02d}] Sending ESCAPE key to dismiss popups...", flush=True)
+            ActionChains(browser).send_keys(Keys.ESCAPE).perform()
             # Critical: Wait a moment for the modal fade-out animation to finish
             time.sleep(0.5) 
         except Exception as e:
             if debug:
-                print(f"Could not send ESCAPE key: {e}", flush=True)
+                print(f"[View {index:02d}] Could not send ESCAPE key: {e}", flush=True)
 
         if debug:
-            print(f"Page title: {self.browser.title}", flush=True)
-            print(f"Page URL: {self.browser.current_url}", flush=True)
+            # One round-trip instead of separate .title / .current_url commands
+            title, page_url = browser.execute_script("return [document.title, location.href];")
+            print(f"[View {index:02d}] Page title: {title}", flush=True)
+            print(f"[View {index:02d}] Page URL: {page_url}", flush=True)
 
-        out_path = f"view_{index:02d}.png"
-        self.browser.save_screenshot(out_path)
-        return out_path
+        try:
+            data, margin = screenshot_center(browser, self._clip_for(browser, w, h, crop_margin), output_format), None
+        except Exception as e:
+            # CDP unavailable: full-window screenshot, cropped and encoded with PIL
+            if debug:
+                print(f"[View {index:02d}] Clipped capture failed ({e}); cropping full screenshot", flush=True)
+            data, margin = browser.get_screenshot_as_png(), crop_margin
+        if cache_path and waited is not None and not flew:
+            # Only fully loaded views whose scene settled are worth replaying: a half-streamed
+            # one would stick, and an in-page flight can't prove the camera reached the URL
+            return self._encode_pool.submit(
+                write_and_cache_view, data, out_path, margin, output_format, cache_path, debug
+            )
+        return self._encode_pool.submit(write_view, data, out_path, margin, output_format)
 
 
 
@@ -205,10 +945,16 @@ class Predictor(BasePredictor):
         address: str = Input(description="Address or 'lat,lon' of the target location"),
         w: int = Input(description="Viewport width", default=1920),
         h: int = Input(description="Viewport height", default=1080),
-        wait_seconds: int = Input(description="Fixed time (seconds) to wait before taking screenshot", default=15),
+        wait_seconds: int = Input(description="Maximum time (seconds) to wait for the scene to settle before taking screenshot", default=15),
         crop_margin: float = Input(description="Center-crop margin per side (0–0.49)", default=0.15),
+        output_format: str = Input(
+            description="Image format of the returned views",
+            choices=list(OUTPUT_FORMATS),
+            default="png"
+        ),
         near_distance_min: float = Input(description="Camera distance for the shot", default=90.0),
         start_heading_deg: float = Input(description="Camera heading (0=N,90=E,180=S,270=W)", default=0.0),
+        num_views: int = Input(description="Number of views, evenly spaced in heading around the target", default=1, ge=1, le=36),
         use_elevation: bool = Input(description="Use Open-Elevation for target altitude", default=True),
         default_alt: float = Input(description="Fallback target altitude (m ASL)", default=30.0),
         # New: google_api_key parameter
@@ -216,23 +962,34 @@ class Predictor(BasePredictor):
             description="API",
             default=None
         ),
+        soft_navigation: bool = Input(
+            description="Reuse an already-loaded Earth page and fly the camera in-page instead of reloading",
+            default=False
+        ),
+        reuse_cached_shots: bool = Input(
+            description="Return a recent capture of the exact same view (same URL, size, crop, format and wait) instead of rendering it again",
+            default=False
+        ),
         debug_urls: bool = Input(description="Print URL and step logs", default=True),
     ) -> List[Path]:
 
+        # Chrome launch is seconds of local work; overlap it with the network lookups below
+        self._spawner.submit(self._respawn_idle, debug_urls)
+
         # --- Geocode ---
         # Prioritize provided key, but fall back to environment variable
         key_to_use = google_api_key or os.getenv("GOOGLE_API_KEY")
-        lat, lon, label = geocode_address(address, key_to_use)
+        lat, lon, label = geocode_address(address, key_to_use, debug=debug_urls)
         
-        # --- Build URL ---
+        # --- Build URLs ---
         # Updated: Handle geocoding failure by building a simpler URL
         if lat is None or lon is None:
             # If geocoding fails, build a URL that only contains the search query
-            hero_url = f"https://earth.google.com/web/search/{quote_plus(address)}/"
+            hero_urls = [f"https://earth.google.com/web/search/{quote_plus(address)}/"]
             if debug_urls:
                 print(f"[Geocoding] All services failed for '{address}'. Using fallback search URL.", flush=True)
                 print("\n=== Generating fallback search URL ===", flush=True)
-                print(f"URL: {hero_url}", flush=True)
+                print(f"URL: {hero_urls[0]}", flush=True)
                 print("==================================\n", flush=True)
         else:
             # If geocoding succeeds, build the full, detailed URL
@@ -251,29 +1008,52 @@ class Predictor(BasePredictor):
             hero_distance = near_distance_min
             hero_fov = 35.0
             hero_roll = 0.0
-            hero_heading = start_heading_deg % 360.0
-
-            hero_url = build_earth_url_with_search(
-                label or address, lat, lon,
-                a=target_alt,
-                d=hero_distance,
-                y=hero_fov,
-                h=hero_heading,
-                t=hero_tilt,
-                r=hero_roll
-            )
+            heading_step = 360.0 / num_views
+
+            # Only the heading varies per view, so escape the address and format the target once
+            url_prefix = build_earth_url_prefix(label or address, lat, lon)
+            hero_urls = [
+                build_earth_url_from_prefix(
+                    url_prefix,
+                    a=target_alt,
+                    d=hero_distance,
+                    y=hero_fov,
+                    h=(start_heading_deg + k * heading_step) % 360.0,
+                    t=hero_tilt,
+                    r=hero_roll
+                )
+                for k in range(num_views)
+            ]
 
             if debug_urls:
-                print("\n=== Generating single hero shot URL ===", flush=True)
-                print(f"URL: {hero_url}", flush=True)
-                print("======================================\n", flush=True)
+                # One write + flush for the whole block rather than one per URL
+                lines = [f"\n=== Generating {len(hero_urls)} hero shot URL(s) ==="]
+                lines += [f"[{i:02d}] URL: {url}" for i, url in enumerate(hero_urls, start=1)]
+                lines.append("======================================\n")
+                print("\n".join(lines), flush=True)
 
         # --- Capture ---
-        full_img_path = self._open_and_capture_new_tab(
-            hero_url, w, h, wait_until=wait_seconds, index=1, debug=debug_urls
-        )
+        # Each view is independent, so fan them out across the browser pool.
+        # Views come back already center-cropped, into a per-run directory so
+        # concurrent predictions never overwrite each other's files.
+        # The previous run's files were handed to Cog when it returned; drop them so
+        # views don't pile up in /tmp (often RAM-backed) across predictions.
+        if self._last_out_dir:
+            shutil.rmtree(self._last_out_dir, ignore_errors=True)
+        out_dir = self._last_out_dir = tempfile.mkdtemp(prefix="earthshot_")
+        ext = OUTPUT_FORMATS[output_format][0]
+        out_paths = [os.path.join(out_dir, f"final_view_{i:02d}.{ext}") for i in range(1, len(hero_urls) + 1)]
+
+        # The geocode-failure fallback is a bare search URL: it doesn't pin the camera, so never cache it
+        reuse_shots = reuse_cached_shots and lat is not None and lon is not None
+
+        def capture(i: int, url: str) -> "Future[str]":
+            return self._capture(
+                url, out_paths[i - 1], w, h, wait_seconds, crop_margin, output_format,
+                index=i, debug=debug_urls, soft_nav=soft_navigation, reuse_shots=reuse_shots
+            )
+
+        with ThreadPoolExecutor(max_workers=min(POOL_SIZE, len(hero_urls))) as executor:
+            writes = list(executor.map(capture, range(1, len(hero_urls) + 1), hero_urls))
 
-        # --- Crop & return ---
-        cropped_img_path = "final_view.png"
-        center_crop(full_img_path, cropped_img_path, crop_margin)
-        return [Path(cropped_img_path)]
\ No newline at end of file
+        return [Path(f.result()) for f in writes]